@@ -4,24 +4,35 @@ Path Verifier Script - Validates MODS folder paths and counts mod folders
 Returns JSON with path validation results and mod folder count
 """
 
+import os
 import sys
 import json
 from pathlib import Path
 
 
-def verify_mods_path(mods_path):
-    """Verify a MODS folder path and count mod folders"""
-    # Strip leading and trailing whitespace from the path
-    mods_path = mods_path.strip()
-    path = Path(mods_path)
-    
-    # Debug info for troubleshooting
-    debug_info = {
+def _list_mod_folders(path):
+    """List mod folder names (directories only) in a single directory pass"""
+    # scandir reports the entry type from the directory listing itself,
+    # so no extra stat call is needed per entry
+    with os.scandir(path) as entries:
+        return [entry.name for entry in entries if entry.is_dir()]
+
+
+def _get_debug_info(mods_path, path):
+    """Collect path details for troubleshooting"""
+    return {
         "original_path": mods_path,
         "resolved_path": str(path.resolve()) if path.exists() else str(path),
         "parent_exists": path.parent.exists() if path.parent != path else False,
         "is_absolute": path.is_absolute()
     }
+
+
+def verify_mods_path(mods_path, debug=False):
+    """Verify a MODS folder path and count mod folders"""
+    # Strip leading and trailing whitespace from the path
+    mods_path = mods_path.strip()
+    path = Path(mods_path)
     
     # Check if path exists
     if not path.exists():
@@ -30,7 +41,7 @@ def verify_mods_path(mods_path):
             "error": "path_not_found", 
             "message": f"The specified path does not exist: {path}",
             "path": str(path),
-            "debug": debug_info
+            "debug": _get_debug_info(mods_path, path)
         }
     
     # Check if it's a directory
@@ -40,16 +51,13 @@ def verify_mods_path(mods_path):
             "error": "not_directory",
             "message": f"The specified path is not a directory: {path}",
             "path": str(path),
-            "debug": debug_info
+            "debug": _get_debug_info(mods_path, path)
         }
     
     # Count mod folders (directories only)
     try:
-        mod_folders = [item for item in path.iterdir() if item.is_dir()]
-        mod_count = len(mod_folders)
-        
-        # Get list of mod folder names for display
-        mod_names = [folder.name for folder in mod_folders]
+        mod_names = _list_mod_folders(path)
+        mod_count = len(mod_names)
         
         result = {
             "status": "success",
@@ -61,9 +69,12 @@ def verify_mods_path(mods_path):
         
         if mod_count == 0:
             result["warning"] = "No mod folders found in this directory"
-            result["debug"] = debug_info
         elif mod_count > 10:
             result["note"] = f"Showing first 10 of {mod_count} mod folders"
+        
+        # Debug info is only gathered when it will be shown
+        if mod_count == 0 or debug:
+            result["debug"] = _get_debug_info(mods_path, path)
             
         return result
         
@@ -73,7 +84,7 @@ def verify_mods_path(mods_path):
             "error": "permission_denied",
             "message": "Permission denied accessing the directory",
             "path": str(path),
-            "debug": debug_info
+            "debug": _get_debug_info(mods_path, path)
         }
     except Exception as e:
         return {
@@ -81,12 +92,17 @@ def verify_mods_path(mods_path):
             "error": "unknown_error",
             "message": f"Error reading directory: {str(e)}",
             "path": str(path),
-            "debug": debug_info
+            "debug": _get_debug_info(mods_path, path)
         }
 
 
 def main():
     """Main function to verify MODS path"""
+    # Check for --debug flag (adds debug details to successful results too)
+    debug = "--debug" in sys.argv
+    if debug:
+        sys.argv.remove("--debug")
+    
     # Debug: Show what arguments we actually received
     arg_debug = {
         "argc": len(sys.argv),
@@ -98,7 +114,7 @@ def main():
         print(json.dumps({
             "status": "error",
             "error": "no_args",
-            "message": "Usage: path_verifier.py <mods_path>",
+            "message": "Usage: path_verifier.py [--debug] <mods_path>",
             "debug_args": arg_debug
         }))
         return 1
@@ -111,9 +127,9 @@ def main():
     else:
         mods_path = sys.argv[1]
     
-    result = verify_mods_path(mods_path)
+    result = verify_mods_path(mods_path, debug=debug)
     # Add argument debugging to the result
-    if result["status"] == "error":
+    if result["status"] == "error" or debug:
         result["debug_args"] = arg_debug
     
     print(json.dumps(result, indent=2))
@@ -4,87 +4,316 @@ Simple No Man's Sky Mod Conflict Checker
 Just shows which mods share the same files MBIN.
 """
 
+import io
 import os
+import sys
+import json
+import hashlib
 from pathlib import Path
-from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
-def find_mod_conflicts(mods_dir):
-    """Find files that exist in multiple mods"""
+# Only files with this extension (compared lowercase) are checked for conflicts
+MBIN_SUFFIX = '.mbin'
+
+# Upper bound on mod folders scanned concurrently
+MAX_SCAN_WORKERS = 32
+
+# Upper bound on conflicting files hashed concurrently; reads are large and
+# sequential, so more threads only make the disk seek between files
+MAX_HASH_WORKERS = 4
+
+# Read size used when hashing conflicting files
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Per-mod file lists and conflicting file digests from the previous run,
+# stored next to this script
+SCAN_CACHE_FILE = "conflict_cache.json"
+
+def _scan_mod(mod_dir):
+    """List MBIN files in one mod; returns (rel_paths, dir_mtimes, complete)
+
+    dir_mtimes maps every directory in the mod (relative, "" for the root)
+    to its mtime, for validating the scan cache. complete is False if any
+    directory couldn't be listed, so the file list may be missing files.
+    """
+    rel_paths = []
+    dir_mtimes = {}
+    # Hot loop: bind lookups to locals once instead of per entry
+    append = rel_paths.append
+    intern = sys.intern
+    stat = os.stat
+    scandir = os.scandir
+    sep = os.sep
+    complete = True
+    
+    # Explicit stack over os.scandir: entry types come from the directory
+    # listing, so no per-file stat or Path object is needed
+    stack = [("", mod_dir)]
+    while stack:
+        rel_dir, dir_path = stack.pop()
+        try:
+            # Stat before listing, so a change made during the scan invalidates the cache
+            dir_mtimes[rel_dir] = stat(dir_path).st_mtime_ns
+            with scandir(dir_path) as entries:
+                for entry in entries:
+                    name = entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append((rel_dir + name + sep, entry.path))
+                    # Only check MBIN files; the name test comes first so other
+                    # files never need their type looked up. Paths are interned so a
+                    # path shared by several mods is one string object
+                    elif name[-5:].lower() == MBIN_SUFFIX and entry.is_file():
+                        append(intern(rel_dir + name))
+        except OSError:
+            # Keep scanning the rest; the partial list is still reported
+            complete = False
+            continue
+    
+    return rel_paths, dir_mtimes, complete
+
+def _is_cache_valid(mod_dir, entry):
+    """Check that no directory in a cached mod changed since it was scanned"""
+    # A hand-edited or truncated entry is a cache miss, not an error
+    dirs = entry.get("dirs")
+    files = entry.get("files")
+    if not isinstance(dirs, dict) or "" not in dirs:
+        return False
+    if not isinstance(files, list) or not all(isinstance(rel_path, str) for rel_path in files):
+        return False
+    
+    # Adding, removing or renaming anything bumps its parent directory's mtime,
+    # so stat-ing the directories is enough to trust the cached file list
+    try:
+        return all(os.stat(os.path.join(mod_dir, rel_dir)).st_mtime_ns == mtime
+                   for rel_dir, mtime in dirs.items())
+    except (OSError, ValueError):
+        return False
+
+def _load_scan_cache(mods_dir):
+    """Load the cache for a MODS folder; returns {"mods": {...}, "digests": {...}}
+
+    Both parts are empty if there is no cache or it belongs to another MODS folder.
+    """
+    cache_path = Path(__file__).parent / SCAN_CACHE_FILE
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = None
+    if not isinstance(cache, dict) or cache.get("mods_dir") != mods_dir:
+        cache = {}
+    mods = cache.get("mods")
+    digests = cache.get("digests")
+    return {
+        "mods": mods if isinstance(mods, dict) else {},
+        "digests": digests if isinstance(digests, dict) else {}
+    }
+
+def _save_scan_cache(mods_dir, cache):
+    """Save the cache for the next run; failures are ignored"""
+    cache_path = Path(__file__).parent / SCAN_CACHE_FILE
+    temp_path = cache_path.with_suffix('.json.tmp')
+    try:
+        # json.dumps uses the C encoder; json.dump would stream every path
+        # through the pure-Python one
+        data = json.dumps({"mods_dir": mods_dir, "mods": cache["mods"], "digests": cache["digests"]},
+                          separators=(',', ':'), ensure_ascii=False)
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(temp_path, cache_path)
+    except OSError:
+        pass
+
+def find_mod_conflicts(mods_dir, cache=None):
+    """Find files that exist in multiple mods; returns (conflicts, total_mods)
+
+    cache is the dict from _load_scan_cache, shared with find_identical_conflicts;
+    it is loaded here when not given.
+    """
     mods_dir = Path(mods_dir)
-    file_to_mods = defaultdict(list)  # file_path -> [mod_names]
     
-    # Scan each mod directory
-    for mod_dir in mods_dir.iterdir():
-        if not mod_dir.is_dir():
+    # Sorted case-insensitively by name, as Windows treats folder names, so every
+    # mod list comes out in the same order on each run, whatever order the
+    # filesystem lists the folders in
+    mod_dirs = sorted((mod_dir for mod_dir in mods_dir.iterdir() if mod_dir.is_dir()),
+                      key=lambda mod_dir: mod_dir.name.casefold())
+    
+    # Reuse last run's file list for every mod whose directories are unchanged
+    cache_key = os.path.realpath(mods_dir)
+    if cache is None:
+        cache = _load_scan_cache(cache_key)
+    cached = cache["mods"]
+    mod_files = {}
+    for mod_dir in mod_dirs:
+        entry = cached.get(mod_dir.name)
+        if isinstance(entry, dict) and _is_cache_valid(mod_dir, entry):
+            entry["files"] = [sys.intern(rel_path) for rel_path in entry["files"]]
+            mod_files[mod_dir.name] = entry
+    to_scan = [mod_dir for mod_dir in mod_dirs if mod_dir.name not in mod_files]
+    
+    # Scan the remaining mod directories in parallel; the filesystem calls release the GIL
+    incomplete = set()
+    if to_scan:
+        with ThreadPoolExecutor(max_workers=max(1, min(MAX_SCAN_WORKERS, len(to_scan)))) as executor:
+            for mod_dir, (rel_paths, dir_mtimes, complete) in zip(to_scan, executor.map(_scan_mod, to_scan)):
+                mod_files[mod_dir.name] = {"dirs": dir_mtimes, "files": rel_paths}
+                if not complete:
+                    incomplete.add(mod_dir.name)
+    
+    # A mod with a directory that couldn't be listed is left out of the cache:
+    # fixing the error doesn't change any mtime, so its partial file list
+    # would otherwise be trusted on every later run
+    cache["mods"] = {mod_name: entry for mod_name, entry in mod_files.items() if mod_name not in incomplete}
+    
+    # Only write the cache back when something was rescanned or a mod went away
+    if to_scan or len(cached) != len(mod_files):
+        _save_scan_cache(cache_key, cache)
+    
+    # Single pass in mod_dirs order: remember the first mod that ships each
+    # path and only start a mod list once a second mod claims it, so each
+    # file's mod list matches a sequential scan and no filtering is needed
+    seen = {}  # file_path -> first mod_name
+    conflicts = {}  # file_path -> [mod_names]
+    for mod_dir in mod_dirs:
+        mod_name = sys.intern(mod_dir.name)
+        for rel_path in mod_files[mod_name]["files"]:
+            prior = seen.get(rel_path)
+            if prior is None:
+                seen[rel_path] = mod_name
+            elif rel_path in conflicts:
+                conflicts[rel_path].append(mod_name)
+            else:
+                conflicts[rel_path] = [prior, mod_name]
+    
+    return conflicts, len(mod_dirs)
+
+def _hash_file(file_path):
+    """Hash a file's contents in chunks; returns a hex digest, or None if it can't be read"""
+    hasher = hashlib.blake2b(digest_size=16)
+    try:
+        with open(file_path, 'rb', buffering=0) as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                hasher.update(chunk)
+    except OSError:
+        return None
+    return hasher.hexdigest()
+
+def _digest_copies(mods_dir, file_path, mods, known):
+    """Digest every mod's copy of file_path
+
+    Returns {copy_key: [mtime_ns, size, hex_digest]}, or None when the copies
+    differ in size or one can't be read. Digests in known are reused for
+    copies whose mtime and size are unchanged.
+    """
+    copies = []
+    try:
+        for mod in mods:
+            copy_key = os.path.join(mod, file_path)
+            st = os.stat(os.path.join(mods_dir, copy_key))
+            copies.append((copy_key, st.st_mtime_ns, st.st_size))
+    except OSError:
+        return None
+    
+    # Different sizes can't be identical, so only hash when all sizes match
+    if len({size for _, _, size in copies}) > 1:
+        return None
+    
+    digests = {}
+    for copy_key, mtime, size in copies:
+        entry = known.get(copy_key)
+        if isinstance(entry, list) and entry[:2] == [mtime, size] and len(entry) == 3:
+            digests[copy_key] = entry
             continue
-            
-        mod_name = mod_dir.name
-        
-        # Find all files in this mod
-        for file_path in mod_dir.rglob('*'):
-            if file_path.is_file():
-                # Get relative path from mod root
-                rel_path = file_path.relative_to(mod_dir)
-                
-                # Only check MBIN files
-                if rel_path.suffix.lower() == '.mbin':
-                    file_to_mods[str(rel_path)].append(mod_name)
+        digest = _hash_file(os.path.join(mods_dir, copy_key))
+        if digest is None:
+            return None
+        digests[copy_key] = [mtime, size, digest]
+    return digests
+
+def find_identical_conflicts(mods_dir, conflicts, cache=None):
+    """Find conflicting files whose content is identical in every mod
+
+    Digests are kept in the cache, so a copy is only read again once its
+    mtime or size changes.
+    """
+    cache_key = os.path.realpath(mods_dir)
+    if cache is None:
+        cache = _load_scan_cache(cache_key)
+    known = cache["digests"]
     
-    # Find conflicts
-    conflicts = {file_path: mods for file_path, mods in file_to_mods.items() if len(mods) > 1}
+    # Only files already known to collide are read, usually a small fraction of the tree
+    file_paths = list(conflicts)
+    digests = {}
+    identical = set()
+    with ThreadPoolExecutor(max_workers=MAX_HASH_WORKERS) as executor:
+        results = executor.map(lambda file_path: _digest_copies(mods_dir, file_path, conflicts[file_path], known),
+                               file_paths)
+        for file_path, copy_digests in zip(file_paths, results):
+            if copy_digests is None:
+                continue
+            digests.update(copy_digests)
+            if len({entry[2] for entry in copy_digests.values()}) == 1:
+                identical.add(file_path)
     
-    return conflicts
+    # Keep only the digests of files that still conflict, and only write
+    # the cache back when they changed
+    if digests != known:
+        cache["digests"] = digests
+        _save_scan_cache(cache_key, cache)
+    
+    return identical
 
 def main():
-    import sys
-    
     # Parse command line arguments
+    args = sys.argv[1:]
+    # Optional second pass that reads conflicting files to find identical copies
+    check_identical = "--check-identical" in args
+    if check_identical:
+        args.remove("--check-identical")
     mods_dir = Path("../GAMEDATA/MODS")  # default
-    if len(sys.argv) >= 3 and sys.argv[1] == "--mods-dir":
-        mods_dir = Path(sys.argv[2])
+    if len(args) >= 2 and args[0] == "--mods-dir":
+        mods_dir = Path(args[1])
     
     if not mods_dir.exists():
         print(f"Error: Mods directory not found: {mods_dir}")
         return
     
-    conflicts = find_mod_conflicts(mods_dir)
+    # One cache load shared by the scan and the identical-copy check
+    cache = _load_scan_cache(os.path.realpath(mods_dir))
+    conflicts, total_mods = find_mod_conflicts(mods_dir, cache)
+    identical = find_identical_conflicts(mods_dir, conflicts, cache) if check_identical else set()
     
-    # Write to both console and file
-    output_lines = []
-    output_lines.append("=" * 70)
-    output_lines.append("MOD CONFLICT ANALYSIS REPORT")
-    output_lines.append("=" * 70)
+    # Build the whole report in one buffer and write it once
+    buf = io.StringIO()
+    w = buf.write
+    rule = "=" * 70
+    separator = "-" * 70
+    w(f"\n{rule}\nMOD CONFLICT ANALYSIS REPORT\n{rule}\n")
     
     if not conflicts:
-        output_lines.append("No conflicts found! All mods modify different files.")
+        w("No conflicts found! All mods modify different files.\n")
     else:
-        # Analyze conflicts and mod count for summary
-        total_affected_mods = set()
-        
-        for file_path, mods in conflicts.items():
-            total_affected_mods.update(mods)
-        
-        total_mods = len([d for d in mods_dir.iterdir() if d.is_dir()])
+        # Mods involved in any conflict, gathered in one C-level union
+        total_affected_mods = set().union(*conflicts.values())
         
-        output_lines.append("SUMMARY:")
-        output_lines.append(f"  Found {len(conflicts)} conflicting MBIN files")
-        output_lines.append(f"  {len(total_affected_mods)} of your {total_mods} mods are involved")
-        output_lines.append("")
-        output_lines.append("CONFLICTS:")
-        output_lines.append("")
+        w("SUMMARY:\n")
+        w(f"  Found {len(conflicts)} conflicting MBIN files\n")
+        w(f"  {len(total_affected_mods)} of your {total_mods} mods are involved\n")
+        if identical:
+            w(f"  {len(identical)} of these files are identical copies in every mod (no real conflict)\n")
+        w("\nCONFLICTS:\n\n")
         
-        for i, (file_path, mods) in enumerate(sorted(conflicts.items()), 1):
-            output_lines.append(f"[{i}] {file_path}")
-            output_lines.append(f"    Conflicting mods:")
-            for mod in mods:
-                output_lines.append(f"      - {mod}")
-            output_lines.append("-" * 70)
-            output_lines.append("")
+        # Sort the keys alone; no (path, mods) tuples to build or compare
+        for i, file_path in enumerate(sorted(conflicts), 1):
+            mods = conflicts[file_path]
+            label = " (identical copies)" if file_path in identical else ""
+            mod_lines = "".join(f"      - {mod}\n" for mod in mods)
+            w(f"[{i}] {file_path}\n    Conflicting mods{label}:\n{mod_lines}{separator}\n\n")
         
-        output_lines.append("=" * 70)
+        w(f"{rule}\n")
     
     # Print to console
-    print("\n" + "\n".join(output_lines))
+    sys.stdout.write(buf.getvalue())
 
 if __name__ == "__main__":
     main()
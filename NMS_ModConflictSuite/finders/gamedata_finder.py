@@ -4,9 +4,32 @@ GAMEDATA Finder Script - Intelligently locates GAMEDATA/MODS folder relative to
 Searches upward and sideways in directory tree to find No Man's Sky installation
 """
 
+import os
 import sys
 import json
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# Number of candidate paths probed in parallel
+PROBE_WORKERS = 8
+
+
+def _list_subdirs(path):
+    """List subdirectory entries of path, or an empty list if it can't be read"""
+    try:
+        with os.scandir(path) as entries:
+            return [entry for entry in entries if entry.is_dir()]
+    except OSError:
+        return []
+
+
+def _has_subdirs(path):
+    """Check whether path contains at least one subdirectory"""
+    try:
+        with os.scandir(path) as entries:
+            return any(entry.is_dir() for entry in entries)
+    except OSError:
+        return False
 
 
 def find_gamedata_from_current():
@@ -39,96 +62,95 @@ def find_gamedata_from_current():
         "../../../steamapps/common/No Man's Sky/GAMEDATA/MODS",
     ]
     
-    for pattern in search_patterns:
-        potential_path = script_dir / pattern
-        try:
-            resolved_path = potential_path.resolve()
-            if resolved_path.exists() and resolved_path.is_dir():
-                # Verify it looks like a MODS directory by checking for subdirectories
-                subdirs = [item for item in resolved_path.iterdir() if item.is_dir()]
-                if len(subdirs) > 0:  # Has at least some subdirectories
-                    return str(resolved_path)
-        except (OSError, RuntimeError):
-            continue
+    # Resolve the script location once so candidates can be normalized lexically
+    base_dir = os.path.realpath(script_dir)
+    candidates = [os.path.normpath(os.path.join(base_dir, pattern)) for pattern in search_patterns]
     
-    # Try searching upward in directory tree
-    current_dir = script_dir
+    # Probe candidates concurrently since each miss can be slow on network or
+    # spinning drives, then take the first hit in search_patterns order.
+    # Verify it looks like a MODS directory by checking for subdirectories;
+    # missing paths and non-directories fail the single scandir call
+    with ThreadPoolExecutor(max_workers=PROBE_WORKERS) as executor:
+        for candidate, found in zip(candidates, executor.map(_has_subdirs, candidates)):
+            if found:
+                return candidate
+    
+    # Try searching upward in directory tree, listing each directory once
+    # instead of probing every candidate name separately
     max_levels = 5  # Don't search too far up
     
-    for level in range(max_levels):
-        # Look for GAMEDATA folder in current directory
-        gamedata_path = current_dir / "GAMEDATA" / "MODS"
-        if gamedata_path.exists() and gamedata_path.is_dir():
-            return str(gamedata_path)
+    for current_dir in [script_dir, *script_dir.parents][:max_levels]:
+        # Keyed by lowercase name since Windows paths are case-insensitive
+        subdirs = {entry.name.lower(): entry.path for entry in _list_subdirs(current_dir)}
         
-        # Look for standalone mods directory (MO2 style)
-        mods_path = current_dir / "mods"
-        if mods_path.exists() and mods_path.is_dir():
-            # Verify it has mod subdirectories
-            subdirs = [item for item in mods_path.iterdir() if item.is_dir()]
-            if len(subdirs) > 0:
-                return str(mods_path)
+        # Look for GAMEDATA folder in current directory
+        if "gamedata" in subdirs:
+            gamedata_path = os.path.join(subdirs["gamedata"], "MODS")
+            if os.path.isdir(gamedata_path):
+                return gamedata_path
         
-        # Look for uppercase MODS directory
-        mods_upper_path = current_dir / "MODS"
-        if mods_upper_path.exists() and mods_upper_path.is_dir():
-            # Verify it has mod subdirectories
-            subdirs = [item for item in mods_upper_path.iterdir() if item.is_dir()]
-            if len(subdirs) > 0:
-                return str(mods_upper_path)
+        # Look for standalone mods directory (MO2 style) or uppercase MODS,
+        # verifying it has mod subdirectories
+        if "mods" in subdirs and _has_subdirs(subdirs["mods"]):
+            return subdirs["mods"]
         
         # Look for No Man's Sky folder in current directory
-        nms_path = current_dir / "No Man's Sky" / "GAMEDATA" / "MODS"
-        if nms_path.exists() and nms_path.is_dir():
-            return str(nms_path)
-        
-        # Move up one directory
-        parent_dir = current_dir.parent
-        if parent_dir == current_dir:  # Reached root
-            break
-        current_dir = parent_dir
+        if "no man's sky" in subdirs:
+            nms_path = os.path.join(subdirs["no man's sky"], "GAMEDATA", "MODS")
+            if os.path.isdir(nms_path):
+                return nms_path
     
     return None
 
 
-def scan_directory_tree(base_path, target_names=["MODS", "mods"], max_depth=3):
-    """Recursively scan directory tree looking for MODS or mods folders"""
-    base_path = Path(base_path)
-    found_paths = []
+def scan_directory_tree(base_path, target_names=("MODS", "mods"), max_depth=3):
+    """Walk directory tree depth-first, yielding MODS or mods folders as they are found"""
+    # Stack of (remaining entries, depth) so the walk can stop at the first match
+    stack = [(iter(_list_subdirs(base_path)), 0)]
     
-    def _scan_recursive(path, depth):
-        if depth > max_depth:
-            return
+    while stack:
+        entries, depth = stack[-1]
+        entry = next(entries, None)
+        if entry is None:
+            stack.pop()
+            continue
         
-        try:
-            for item in path.iterdir():
-                if not item.is_dir():
-                    continue
-                
-                # Check if this is a MODS or mods folder with contents
-                if item.name in target_names:
-                    subdirs = [sub for sub in item.iterdir() if sub.is_dir()]
-                    if len(subdirs) > 0:
-                        found_paths.append(str(item))
-                        continue
-                
-                # Check if this is GAMEDATA folder
-                if item.name == "GAMEDATA":
-                    mods_path = item / "MODS"
-                    if mods_path.exists() and mods_path.is_dir():
-                        subdirs = [sub for sub in mods_path.iterdir() if sub.is_dir()]
-                        if len(subdirs) > 0:
-                            found_paths.append(str(mods_path))
-                        continue
-                
-                # Recursively search subdirectories
-                _scan_recursive(item, depth + 1)
-                
-        except (PermissionError, OSError):
-            pass
+        # Check if this is a MODS or mods folder with contents
+        if entry.name in target_names and _has_subdirs(entry.path):
+            yield entry.path
+            continue
+        
+        # Check if this is GAMEDATA folder
+        if entry.name == "GAMEDATA":
+            mods_path = os.path.join(entry.path, "MODS")
+            if _has_subdirs(mods_path):
+                yield mods_path
+            continue
+        
+        # Search subdirectories
+        if depth < max_depth:
+            stack.append((iter(_list_subdirs(entry.path)), depth + 1))
+
+
+def build_result(mods_path, detection_method):
+    """Count mod folders at a found MODS path and build the result with its exit code"""
+    try:
+        with os.scandir(mods_path) as entries:
+            mod_count = sum(1 for entry in entries if entry.is_dir())
+    except Exception as e:
+        return {
+            "status": "error",
+            "error": "access_denied",
+            "message": f"Found path but cannot access: {str(e)}",
+            "path": mods_path
+        }, 1
     
-    _scan_recursive(base_path, 0)
-    return found_paths
+    return {
+        "status": "success",
+        "mods_path": mods_path,
+        "mod_count": mod_count,
+        "detection_method": detection_method
+    }, 0
 
 
 def main():
@@ -137,68 +159,27 @@ def main():
     gamedata_path = find_gamedata_from_current()
     
     if gamedata_path:
-        # Verify the path and count mods
-        path = Path(gamedata_path)
-        try:
-            mod_folders = [item for item in path.iterdir() if item.is_dir()]
-            mod_count = len(mod_folders)
-            
-            print(json.dumps({
-                "status": "success",
-                "mods_path": str(path),
-                "mod_count": mod_count,
-                "detection_method": "relative_search"
-            }))
-            return 0
-            
-        except Exception as e:
-            print(json.dumps({
-                "status": "error",
-                "error": "access_denied",
-                "message": f"Found path but cannot access: {str(e)}",
-                "path": gamedata_path
-            }))
-            return 1
-    
-    # Try scanning current directory tree as fallback
-    script_dir = Path(__file__).parent.absolute()
-    found_paths = scan_directory_tree(script_dir)
-    
-    if found_paths:
-        # Use the first found path
-        best_path = found_paths[0]
-        path = Path(best_path)
+        result, exit_code = build_result(gamedata_path, "relative_search")
+    else:
+        # Try scanning current directory tree as fallback, using the first found path
+        script_dir = Path(__file__).parent.absolute()
+        best_path = next(scan_directory_tree(script_dir), None)
         
-        try:
-            mod_folders = [item for item in path.iterdir() if item.is_dir()]
-            mod_count = len(mod_folders)
-            
-            print(json.dumps({
-                "status": "success", 
-                "mods_path": str(path),
-                "mod_count": mod_count,
-                "detection_method": "directory_scan",
-                "all_found_paths": found_paths
-            }))
-            return 0
-            
-        except Exception as e:
-            print(json.dumps({
+        if best_path:
+            result, exit_code = build_result(best_path, "directory_scan")
+        else:
+            # No GAMEDATA/MODS found
+            result = {
                 "status": "error",
-                "error": "access_denied", 
-                "message": f"Found path but cannot access: {str(e)}",
-                "path": best_path
-            }))
-            return 1
+                "error": "gamedata_not_found",
+                "message": "No GAMEDATA/MODS directory found relative to script location",
+                "searched_from": str(script_dir)
+            }
+            exit_code = 1
     
-    # No GAMEDATA/MODS found
-    print(json.dumps({
-        "status": "error",
-        "error": "gamedata_not_found",
-        "message": "No GAMEDATA/MODS directory found relative to script location",
-        "searched_from": str(script_dir)
-    }))
-    return 1
+    # Serialize once and write the bytes directly, bypassing text-mode newline translation
+    sys.stdout.buffer.write(json.dumps(result).encode('utf-8') + b"\n")
+    return exit_code
 
 
 if __name__ == "__main__":
@@ -9,40 +9,75 @@ from pathlib import Path
 import json
 import string
 import os
+import stat
+import ctypes
+import re
+import mmap
 try:
     import winreg
 except ImportError:
     winreg = None
 
+# Matches "path" "<value>" entries in libraryfolders.vdf
+VDF_PATH_PATTERN = re.compile(rb'"path"\s*"([^"]+)"', re.IGNORECASE)
+
+# os.stat results for this run, keyed by path string (None if missing)
+_stat_cache = {}
+
+
+# find_nms_in_library results for this run, keyed by library path string
+_library_results = {}
+
+
+def _cached_stat(path):
+    """Stat a path at most once per run, returning None if it doesn't exist"""
+    path = os.fspath(path)
+    if path not in _stat_cache:
+        try:
+            _stat_cache[path] = os.stat(path)
+        except OSError:
+            _stat_cache[path] = None
+    return _stat_cache[path]
+
+
+def _path_exists(path):
+    """Cached equivalent of Path.exists()"""
+    return _cached_stat(path) is not None
+
 
 def find_steam_from_registry():
     """Find Steam installation path from Windows registry"""
     if not winreg:
         return None
     
-    # Registry keys where Steam installation path might be stored
+    # Registry keys where Steam installation path might be stored, with the
+    # value names to try under each; every key is opened only once
     registry_keys = [
-        (winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\WOW6432Node\Valve\Steam", "InstallPath"),
-        (winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\Valve\Steam", "InstallPath"),
-        (winreg.HKEY_CURRENT_USER, r"SOFTWARE\Valve\Steam", "SteamPath"),
-        (winreg.HKEY_CURRENT_USER, r"SOFTWARE\Valve\Steam", "SteamExe"),
+        (winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\WOW6432Node\Valve\Steam", ("InstallPath",)),
+        (winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\Valve\Steam", ("InstallPath",)),
+        (winreg.HKEY_CURRENT_USER, r"SOFTWARE\Valve\Steam", ("SteamPath", "SteamExe")),
     ]
     
-    for hkey, subkey, value_name in registry_keys:
+    for hkey, subkey, value_names in registry_keys:
         try:
             with winreg.OpenKey(hkey, subkey) as key:
-                steam_path, _ = winreg.QueryValueEx(key, value_name)
-                
-                # Handle SteamExe case (points to steam.exe, we need the directory)
-                if value_name == "SteamExe":
-                    steam_path = str(Path(steam_path).parent)
-                
-                # Convert to Path object and verify
-                steam_path = Path(steam_path)
-                if steam_path.exists() and (steam_path / "steam.exe").exists():
-                    return steam_path
+                for value_name in value_names:
+                    try:
+                        steam_path, _ = winreg.QueryValueEx(key, value_name)
+                    except OSError:
+                        continue
+                    if not isinstance(steam_path, str) or not steam_path:
+                        continue
                     
-        except (FileNotFoundError, OSError, Exception):
+                    # Handle SteamExe case (points to steam.exe, we need the directory)
+                    if value_name == "SteamExe":
+                        steam_path = os.path.dirname(steam_path)
+                    
+                    # Verify (steam.exe existing implies the folder does)
+                    if _path_exists(os.path.join(steam_path, "steam.exe")):
+                        return Path(steam_path)
+                    
+        except OSError:
             continue
     
     return None
@@ -50,12 +85,19 @@ def find_steam_from_registry():
 
 def get_available_drives():
     """Get all available drive letters on Windows"""
-    drives = []
-    for letter in string.ascii_uppercase:
-        drive_path = f"{letter}:\\"
-        if os.path.exists(drive_path):
-            drives.append(letter)
-    return drives
+    letters = string.ascii_uppercase
+    if sys.platform == "win32":
+        # A single GetLogicalDrives call returns a bitmask of drives (bit 0 = A:)
+        try:
+            mask = ctypes.windll.kernel32.GetLogicalDrives()
+        except (AttributeError, OSError):
+            mask = 0
+        if mask:
+            letters = [letter for i, letter in enumerate(letters) if mask & (1 << i)]
+    
+    # The mask also lists drives that aren't ready (empty card readers or disc
+    # drives, disconnected network shares); one cached stat of each root skips them
+    return [letter for letter in letters if _path_exists(f"{letter}:\\")]
 
 
 def find_steam_fallback():
@@ -72,9 +114,9 @@ def find_steam_fallback():
     
     for drive in drives:
         for steam_path in steam_paths:
-            full_path = Path(f"{drive}:/{steam_path}")
-            if full_path.exists() and (full_path / "steam.exe").exists():
-                return full_path
+            full_path = f"{drive}:/{steam_path}"
+            if _path_exists(os.path.join(full_path, "steam.exe")):
+                return Path(full_path)
     
     return None
 
@@ -95,14 +137,15 @@ def parse_library_folders(steam_path):
     library_paths = []
     
     # Try different locations for libraryfolders.vdf
+    steam_dir = os.fspath(steam_path)
     vdf_locations = [
-        steam_path / "steamapps" / "libraryfolders.vdf",
-        steam_path / "config" / "libraryfolders.vdf"
+        os.path.join(steam_dir, "steamapps", "libraryfolders.vdf"),
+        os.path.join(steam_dir, "config", "libraryfolders.vdf")
     ]
     
     library_vdf = None
     for vdf_path in vdf_locations:
-        if vdf_path.exists():
+        if _path_exists(vdf_path):
             library_vdf = vdf_path
             break
     
@@ -110,21 +153,18 @@ def parse_library_folders(steam_path):
         return library_paths
     
     try:
-        with open(library_vdf, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
-            
-        # Parse the VDF format to extract library paths
-        lines = content.split('\n')
-        for line in lines:
-            line = line.strip()
-            if '"path"' in line.lower():
-                # Extract the path value
-                parts = line.split('"')
-                if len(parts) >= 4:
-                    path_value = parts[3]
+        with open(library_vdf, 'rb') as f:
+            # An empty file can't be mapped and has no paths anyway
+            if os.fstat(f.fileno()).st_size == 0:
+                return library_paths
+            # Scan the mapped file directly instead of reading a copy into memory
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                # Parse the VDF format to extract library paths in a single regex scan
+                for match in VDF_PATH_PATTERN.finditer(content):
+                    path_value = match.group(1).decode('utf-8', errors='ignore')
                     # Clean up the path
                     path_value = path_value.replace('\\\\', '\\').replace('\\', '/')
-                    if path_value and Path(path_value).exists():
+                    if path_value and _path_exists(path_value):
                         library_paths.append(Path(path_value))
                         
     except Exception:
@@ -135,19 +175,38 @@ def parse_library_folders(steam_path):
 
 def find_nms_in_library(library_path):
     """Check if No Man's Sky exists in a Steam library"""
-    manifest_path = library_path / "steamapps" / "appmanifest_275850.acf"
-    if not manifest_path.exists():
+    # The main Steam folder is usually listed in libraryfolders.vdf as well
+    library_key = os.fspath(library_path)
+    if library_key not in _library_results:
+        _library_results[library_key] = _probe_library(library_key)
+    return _library_results[library_key]
+
+
+def _probe_library(library_dir):
+    """Uncached body of find_nms_in_library"""
+    # Plain string joins; no intermediate Path objects per probe
+    steamapps = os.path.join(library_dir, "steamapps")
+    
+    # A library without steamapps/common has no installed games at all;
+    # reject it with one check before looking for the manifest
+    common = os.path.join(steamapps, "common")
+    common_stat = _cached_stat(common)
+    if common_stat is None or not stat.S_ISDIR(common_stat.st_mode):
+        return None, "no_manifest"
+    
+    manifest_path = os.path.join(steamapps, "appmanifest_275850.acf")
+    if not _path_exists(manifest_path):
         return None, "no_manifest"
     
-    game_path = library_path / "steamapps" / "common" / "No Man's Sky"
-    if not game_path.exists():
+    game_path = os.path.join(common, "No Man's Sky")
+    if not _path_exists(game_path):
         return None, "no_game_folder"
     
-    mods_path = game_path / "GAMEDATA" / "MODS"
-    if not mods_path.exists():
-        return str(game_path), "no_mods_folder"
+    mods_path = os.path.join(game_path, "GAMEDATA", "MODS")
+    if not _path_exists(mods_path):
+        return game_path, "no_mods_folder"
     
-    return str(mods_path), "found"
+    return mods_path, "found"
 
 
 def main():
@@ -4,24 +4,41 @@ Auto Updater Script for NMS Mod Conflict Checker
 Checks for updates from GitHub repository and downloads only changed files
 """
 
+import os
 import sys
 import json
 import hashlib
+import base64
 import zipfile
+import tarfile
+import gzip
+import mmap
 import tempfile
-import shutil
 from pathlib import Path
-from urllib.request import urlopen, Request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urljoin, unquote
+import urllib.request
 from urllib.error import URLError, HTTPError
+import http.client
+import threading
 import ssl
+import re
+try:
+    from hashlib import file_digest  # Python 3.11+
+except ImportError:
+    file_digest = None
 
 # GitHub repository information
 REPO_OWNER = "umbraprior"
 REPO_NAME = "NMS_ModConflictScript"
 REPO_URL = f"https://github.com/{REPO_OWNER}/{REPO_NAME}"
 API_BASE = f"https://api.github.com/repos/{REPO_OWNER}/{REPO_NAME}"
+CODELOAD_BASE = f"https://codeload.github.com/{REPO_OWNER}/{REPO_NAME}"
 BRANCH = "rewrite"
 
+# Folder inside the repository that holds the suite
+REPO_SUBDIR = "NMS_ModConflictSuite"
+
 # Files to track for updates (relative to NMS_ModConflictSuite folder)
 TRACKED_FILES = [
     "run_mcs.bat",
@@ -34,17 +51,97 @@ TRACKED_FILES = [
     "updater/auto_updater.py"
 ]
 
+# Suite folder (NMS_ModConflictSuite) and the local path of every tracked file,
+# built once instead of at each use
+_BASE_DIR = Path(__file__).parent.parent
+_TRACKED_PATHS = {file_name: _BASE_DIR / file_name for file_name in TRACKED_FILES}
+
+USER_AGENT = "NMS-ModConflictScript-AutoUpdater/1.0"
+
+# Keep-alive connection pool shared by all requests (host -> idle connections).
+# At most POOL_MAXSIZE idle connections are kept per host.
+POOL_MAXSIZE = 8
+MAX_REDIRECTS = 5
+
+# Upper bound on files downloaded concurrently
+MAX_DOWNLOAD_WORKERS = 8
+
+# Upper bound on local files hashed concurrently
+MAX_HASH_WORKERS = 8
+_idle_connections = {}
+_pool_lock = threading.Lock()
+
+# System proxy settings, read on first connection
+_proxies = None
+
+# Built once and shared by every connection; loading the CA store is slow
+_SSL_CONTEXT = ssl.create_default_context()
+
+# Top-level SHA at the start of a commits API response
+COMMIT_SHA_PATTERN = re.compile(rb'\s*\{\s*"sha"\s*:\s*"([0-9a-f]{40})"')
+
 # Version file to track current state
 VERSION_FILE = "version_info.json"
+_VERSION_PATH = Path(__file__).parent / VERSION_FILE
 
+# Parsed version info for this run, shared by every load_version_info() call
+_version_cache = None
 
-def get_file_hash(file_path):
-    """Calculate SHA256 hash of a file"""
-    try:
-        with open(file_path, 'rb') as f:
-            return hashlib.sha256(f.read()).hexdigest()
-    except (FileNotFoundError, PermissionError):
-        return None
+# Hash format stored in version_info["file_hashes"]; older files used SHA256.
+# Must stay git's blob SHA-1 so local hashes compare directly with GitHub trees.
+# Changing _content_hash requires bumping HASH_ALGO so stored hashes are dropped.
+HASH_ALGO = "git-blob-sha1"
+_content_hash = hashlib.sha1
+
+# Read size used when streaming files into the hasher
+HASH_CHUNK_SIZE = 64 * 1024
+
+# Files larger than this are memory-mapped for hashing instead of read
+HASH_MMAP_THRESHOLD = 256 * 1024
+
+
+def _hash_stream(f, hasher):
+    """Feed a binary file object into hasher in fixed-size chunks"""
+    if file_digest is not None:
+        # The standard library's streaming loop; it takes a callable for the
+        # hash object, so the already seeded blob hasher is passed through
+        file_digest(f, lambda: hasher)
+        return
+    
+    # Fallback for Python < 3.11: stream so memory use doesn't grow with file
+    # size; reading into one reused buffer avoids a new bytes object per chunk
+    buffer = bytearray(HASH_CHUNK_SIZE)
+    view = memoryview(buffer)
+    while True:
+        size = f.readinto(buffer)
+        if not size:
+            break
+        hasher.update(view[:size])
+
+
+def _hash_open_file(f, size):
+    """Calculate git blob SHA-1 of an open file (same value GitHub reports in trees)"""
+    hasher = _content_hash(b"blob %d\0" % size)
+    if size > HASH_MMAP_THRESHOLD:
+        # Hash large files straight from the page cache without copying
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            hasher.update(mapped)
+    else:
+        _hash_stream(f, hasher)
+    return hasher.hexdigest()
+
+
+def _tracked_path(file_name):
+    """Local path of a file, relative to the suite folder"""
+    file_path = _TRACKED_PATHS.get(file_name)
+    return file_path if file_path is not None else _BASE_DIR / file_name
+
+
+def get_blob_hash(content):
+    """Calculate git blob SHA-1 of in-memory content (matches local file hashes)"""
+    hasher = _content_hash(b"blob %d\0" % len(content))
+    hasher.update(content)
+    return hasher.hexdigest()
 
 
 def is_first_run(version_info=None):
@@ -57,96 +154,371 @@ def is_first_run(version_info=None):
 
 
 def load_version_info():
-    """Load current version information"""
-    script_dir = Path(__file__).parent 
-    version_file_path = script_dir / VERSION_FILE
-    
-    if not version_file_path.exists():
-        return {
-            "last_commit": None,
-            "file_hashes": {},
-            "last_check": None
-        }
+    """Load current version information
+
+    The file is parsed once per run; later calls return the same dict, so
+    every step works on (and saves) one shared copy.
+    """
+    global _version_cache
+    if _version_cache is None:
+        _version_cache = _read_version_file()
+    return _version_cache
+
+
+def _read_version_file():
+    """Read version_info.json, falling back to empty tracking state"""
+    version_file_path = _VERSION_PATH
     
     try:
         with open(version_file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+            version_info = json.load(f)
     except (json.JSONDecodeError, FileNotFoundError):
         return {
             "last_commit": None,
             "file_hashes": {},
-            "last_check": None
+            "last_check": None,
+            "hash_algo": HASH_ALGO
         }
+    
+    # Hashes recorded with a different algorithm can't be compared; drop them
+    if version_info.get("hash_algo") != HASH_ALGO:
+        version_info["file_hashes"] = {}
+        version_info["stat_cache"] = {}
+        version_info["hash_algo"] = HASH_ALGO
+    
+    return version_info
 
 
 def save_version_info(version_info):
     """Save current version information"""
-    script_dir = Path(__file__).parent
-    version_file_path = script_dir / VERSION_FILE
+    version_file_path = _VERSION_PATH
     
+    # Write to a temporary file and swap it in, so a crash mid-write can't
+    # leave a truncated file that would throw away all cached hashes
+    temp_path = version_file_path.with_suffix('.json.tmp')
     try:
-        with open(version_file_path, 'w', encoding='utf-8') as f:
-            json.dump(version_info, f, indent=2)
-        return True
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            # Machine-read only, so compact. json.dumps builds the string with the
+            # C encoder; json.dump always falls back to the pure-Python one
+            f.write(json.dumps(version_info, separators=(',', ':'), ensure_ascii=False))
+        os.replace(temp_path, version_file_path)
     except Exception:
         return False
+    
+    # Later loads in this run see exactly what was written
+    global _version_cache
+    _version_cache = version_info
+    return True
 
 
-def make_request(url, timeout=10):
-    """Make HTTP request with error handling"""
+def _acquire_connection(host, timeout):
+    """Get an idle keep-alive connection for host, or open a new one"""
+    with _pool_lock:
+        idle = _idle_connections.get(host)
+        if idle:
+            conn = idle.pop()
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            return conn, True
+    
+    proxy = _get_https_proxy(host)
+    if proxy is None:
+        return http.client.HTTPSConnection(host, timeout=timeout, context=_SSL_CONTEXT), False
+    
+    # Connect to the proxy and tunnel TLS to the real host through CONNECT
+    proxy_host, proxy_port, tunnel_headers = proxy
+    conn = http.client.HTTPSConnection(proxy_host, proxy_port, timeout=timeout, context=_SSL_CONTEXT)
+    conn.set_tunnel(host, headers=tunnel_headers)
+    return conn, False
+
+
+def _get_https_proxy(host):
+    """Proxy to reach host through, as (proxy_host, proxy_port, tunnel_headers), or None
+
+    Uses the same settings urlopen does: HTTPS_PROXY/NO_PROXY, or the
+    system proxy configuration on Windows and macOS.
+    """
+    global _proxies
+    if _proxies is None:
+        _proxies = urllib.request.getproxies()
+    proxy = _proxies.get('https')
+    if not proxy or urllib.request.proxy_bypass(host):
+        return None
+    
+    parts = urlsplit(proxy if '://' in proxy else f"http://{proxy}")
+    tunnel_headers = {}
+    if parts.username:
+        credentials = f"{unquote(parts.username)}:{unquote(parts.password or '')}"
+        tunnel_headers['Proxy-Authorization'] = "Basic " + base64.b64encode(credentials.encode('utf-8')).decode('ascii')
+    return parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80), tunnel_headers
+
+
+def _release_connection(host, conn):
+    """Return a connection to the idle pool so later requests can reuse it"""
+    with _pool_lock:
+        idle = _idle_connections.setdefault(host, [])
+        if len(idle) < POOL_MAXSIZE:
+            idle.append(conn)
+            return
+    
+    # Pool for this host is full; close outside the lock
+    conn.close()
+
+
+def _start_request(host, path, timeout, headers):
+    """Send a GET over a pooled connection and return (conn, response) with the body unread"""
+    while True:
+        conn, reused = _acquire_connection(host, timeout)
+        try:
+            conn.request('GET', path, headers=headers)
+            return conn, conn.getresponse()
+        except (ConnectionError, ssl.SSLEOFError):
+            conn.close()
+            # The server may drop an idle keep-alive connection; retry on a fresh one.
+            # ConnectionError covers resets, aborts (WinError 10053) and broken pipes;
+            # a connection closed mid-TLS shows up as SSLEOFError.
+            if reused:
+                continue
+            raise
+        except Exception:
+            conn.close()
+            raise
+
+
+def _finish_response(host, conn, response):
+    """Return a connection whose response has been fully read to the pool"""
+    if response.will_close:
+        conn.close()
+    else:
+        _release_connection(host, conn)
+
+
+def _send_request(host, path, timeout, extra_headers=None):
+    """Send a GET over a pooled connection and return (response, body)"""
+    headers = {
+        'User-Agent': USER_AGENT,
+        # Text files compress well; GitHub gzips responses when asked
+        'Accept-Encoding': 'gzip'
+    }
+    if extra_headers:
+        headers.update(extra_headers)
+    
+    conn, response = _start_request(host, path, timeout, headers)
     try:
-        # Create SSL context that doesn't verify certificates (for compatibility)
-        context = ssl.create_default_context()
-        context.check_hostname = False
-        context.verify_mode = ssl.CERT_NONE
+        body = response.read()
+    except Exception:
+        conn.close()
+        raise
+    _finish_response(host, conn, response)
+    
+    if response.getheader('Content-Encoding', '').lower() == 'gzip':
+        body = gzip.decompress(body)
+    return response, body
+
+
+def _get(url, timeout, extra_headers=None, missing_ok=False):
+    """Perform a GET following redirects and return (response, body)
+
+    With missing_ok, a 404 is returned as (response, None) rather than raised.
+    """
+    try:
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            path = parts.path + (f"?{parts.query}" if parts.query else "")
+            response, body = _send_request(parts.netloc, path, timeout, extra_headers)
+            
+            if response.status in (301, 302, 303, 307, 308):
+                url = urljoin(url, response.getheader('Location'))
+                continue
+            if response.status == 404 and missing_ok:
+                return response, None
+            if response.status >= 400:
+                raise HTTPError(url, response.status, response.reason, response.headers, None)
+            
+            return response, body
         
-        req = Request(url)
-        req.add_header('User-Agent', 'NMS-ModConflictScript-AutoUpdater/1.0')
+        raise URLError("too many redirects")
+    except (URLError, HTTPError, ssl.SSLError, http.client.HTTPException, OSError) as e:
+        raise Exception(f"Network request failed: {str(e)}")
+
+
+def make_request_bytes(url, timeout=10):
+    """Make HTTP request and return the raw response body"""
+    return _get(url, timeout)[1]
+
+
+def _open_stream(url, timeout):
+    """Start a GET following redirects; returns (host, conn, response) with the body unread
+
+    The caller reads the body and then hands the connection back with
+    _finish_response, or closes it if it stops reading early.
+    """
+    headers = {'User-Agent': USER_AGENT}
+    try:
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            path = parts.path + (f"?{parts.query}" if parts.query else "")
+            conn, response = _start_request(parts.netloc, path, timeout, headers)
+            
+            if response.status in (301, 302, 303, 307, 308) or response.status >= 400:
+                # Small bodies; read them so the connection can be reused
+                try:
+                    response.read()
+                except Exception:
+                    conn.close()
+                    raise
+                _finish_response(parts.netloc, conn, response)
+                if response.status >= 400:
+                    raise HTTPError(url, response.status, response.reason, response.headers, None)
+                url = urljoin(url, response.getheader('Location'))
+                continue
+            
+            return parts.netloc, conn, response
         
-        with urlopen(req, timeout=timeout, context=context) as response:
-            return response.read().decode('utf-8')
-    except (URLError, HTTPError, ssl.SSLError) as e:
+        raise URLError("too many redirects")
+    except (URLError, HTTPError, ssl.SSLError, http.client.HTTPException, OSError) as e:
         raise Exception(f"Network request failed: {str(e)}")
 
 
-def get_latest_commit():
+def make_conditional_request(url, etag=None, timeout=10):
+    """Make HTTP request with If-None-Match; returns (body bytes or None if unchanged, etag)"""
+    extra_headers = {'If-None-Match': etag} if etag else None
+    response, body = _get(url, timeout, extra_headers)
+    
+    if response.status == 304:
+        return None, etag
+    return body, response.getheader('ETag')
+
+
+def get_latest_commit(version_info=None):
     """Get latest commit information from GitHub API"""
     try:
+        if version_info is None:
+            version_info = load_version_info()
+        
+        # Revalidate the cached commit with its ETag; a 304 has no body and
+        # doesn't count against the API rate limit
+        cached_commit = version_info.get("commit_cache")
+        etag = version_info.get("commits_etag") if cached_commit else None
+        
         url = f"{API_BASE}/commits/{BRANCH}"
-        response_text = make_request(url)
-        commit_data = json.loads(response_text)
+        response_body, new_etag = make_conditional_request(url, etag)
+        if response_body is None:
+            return dict(cached_commit)
+        
+        # The response leads with the commit SHA; if it's the cached commit
+        # there's no need to parse the rest of the (fairly large) document
+        match = COMMIT_SHA_PATTERN.match(response_body)
+        if cached_commit and match and match.group(1).decode('ascii') == cached_commit["sha"]:
+            latest_commit = cached_commit
+        else:
+            # json.loads detects the UTF-8 encoding of bytes itself
+            commit_data = json.loads(response_body)
+            latest_commit = {
+                "sha": commit_data["sha"],
+                "message": commit_data["commit"]["message"].split('\n')[0],  # First line only
+                "date": commit_data["commit"]["committer"]["date"],
+                "author": commit_data["commit"]["author"]["name"]
+            }
+        
+        if new_etag:
+            version_info["commits_etag"] = new_etag
+            version_info["commit_cache"] = latest_commit
+            save_version_info(version_info)
         
+        return dict(latest_commit)
+    except Exception as e:
+        raise Exception(f"Failed to get commit info: {str(e)}")
+
+
+def get_repo_tree(commit_sha):
+    """Get git blob SHAs of all suite files at a commit in a single API request"""
+    try:
+        url = f"{API_BASE}/git/trees/{commit_sha}?recursive=1"
+        tree_data = json.loads(make_request_bytes(url))
+        
+        prefix = f"{REPO_SUBDIR}/"
         return {
-            "sha": commit_data["sha"],
-            "message": commit_data["commit"]["message"].split('\n')[0],  # First line only
-            "date": commit_data["commit"]["committer"]["date"],
-            "author": commit_data["commit"]["author"]["name"]
+            entry["path"][len(prefix):]: entry["sha"]
+            for entry in tree_data["tree"]
+            if entry["type"] == "blob" and entry["path"].startswith(prefix)
         }
     except Exception as e:
-        raise Exception(f"Failed to get commit info: {str(e)}")
+        raise Exception(f"Failed to get repository tree: {str(e)}")
+
+
+def fetch_tarball(commit_sha, file_names):
+    """Stream the repository tarball once and return contents of the given files"""
+    try:
+        # codeload serves the archive directly; the API tarball URL only redirects here
+        url = f"{CODELOAD_BASE}/tar.gz/{commit_sha}"
+        host, conn, response = _open_stream(url, timeout=30)
+        
+        wanted = set(file_names)
+        contents = {}
+        try:
+            # Stream mode decompresses members as they arrive, without buffering
+            # the archive or seeking back through it
+            with tarfile.open(fileobj=response, mode='r|gz') as tar:
+                for member in tar:
+                    # Member names are prefixed with a generated top-level folder
+                    parts = member.name.split('/', 2)
+                    if len(parts) < 3 or parts[1] != REPO_SUBDIR or parts[2] not in wanted:
+                        continue
+                    if member.isfile():
+                        contents[parts[2]] = tar.extractfile(member).read()
+                        if len(contents) == len(wanted):
+                            break
+            
+            if len(contents) == len(wanted):
+                # Stopped early; the rest of the archive isn't worth downloading
+                conn.close()
+            else:
+                # Drain the archive's padding so the connection can be reused
+                response.read()
+                _finish_response(host, conn, response)
+        except Exception:
+            conn.close()
+            raise
+        
+        return contents
+    except Exception as e:
+        raise Exception(f"Failed to download repository archive: {str(e)}")
 
 
 def get_file_from_repo(file_path, commit_sha):
-    """Download a specific file from GitHub repository"""
+    """Download a specific file from GitHub repository as bytes (None if it isn't there)"""
     try:
         # Use raw GitHub URL to download file contents
-        url = f"https://raw.githubusercontent.com/{REPO_OWNER}/{REPO_NAME}/{commit_sha}/NMS_ModConflictSuite/{file_path}"
-        return make_request(url)
+        url = f"https://raw.githubusercontent.com/{REPO_OWNER}/{REPO_NAME}/{commit_sha}/{REPO_SUBDIR}/{file_path}"
+        # A file missing from the repository is an expected answer, not a failure
+        return _get(url, 10, missing_ok=True)[1]
     except Exception as e:
         raise Exception(f"Failed to download {file_path}: {str(e)}")
 
 
-def check_for_updates(silent=False, include_integrity=False):
+def _download_with_hash(file_path, commit_sha):
+    """Download a file from the repository; returns (content, git blob hash) or (None, None)"""
+    # Hashing here, in the download worker, overlaps with the other
+    # downloads and saves re-reading the file from disk after it's written
+    content = get_file_from_repo(file_path, commit_sha)
+    if content is None:
+        return None, None
+    return content, get_blob_hash(content)
+
+
+def check_for_updates(silent=False, include_integrity=False, version_info=None):
     """Check if updates are available and optionally check file integrity"""
     try:
         if not silent:
             print("Checking for updates...")
         
         # Get current version info
-        current_version = load_version_info()
+        current_version = version_info if version_info is not None else load_version_info()
         
         # Get latest commit
-        latest_commit = get_latest_commit()
+        latest_commit = get_latest_commit(current_version)
         
         result = {
             "updates_available": False,
@@ -156,7 +528,14 @@ def check_for_updates(silent=False, include_integrity=False):
         
         # If we need to include integrity check or if commit changed, check files
         if include_integrity or current_version["last_commit"] != latest_commit["sha"]:
-            changed_files = get_changed_files(latest_commit["sha"])
+            # Already on the latest commit: the recorded hashes are the repo's,
+            # so the local files can be checked against them without the tree
+            changed_files = None
+            if current_version["last_commit"] == latest_commit["sha"]:
+                changed_files = verify_local_against_stored(current_version)
+            if changed_files is None:
+                changed_files = get_changed_files(latest_commit["sha"], include_content=False,
+                                                  version_info=current_version)
             missing_files = []
             corrupted_files = []
             updated_files = []
@@ -167,8 +546,7 @@ def check_for_updates(silent=False, include_integrity=False):
             for file_info in changed_files:
                 if "error" in file_info:
                     # Could be missing file or network error
-                    base_dir = Path(__file__).parent.parent
-                    file_path = base_dir / file_info["name"]
+                    file_path = _tracked_path(file_info["name"])
                     if not file_path.exists():
                         missing_files.append(file_info["name"])
                     else:
@@ -237,68 +615,175 @@ def check_for_updates(silent=False, include_integrity=False):
         }
 
 
-def get_current_file_hash(file_name):
-    """Get hash of current local file"""
-    # Get the base directory (NMS_ModConflictScript)
-    base_dir = Path(__file__).parent.parent
-    file_path = base_dir / file_name
+def get_current_file_hash(file_name, stat_cache=None):
+    """Get hash of current local file, reusing a cached hash if its stat is unchanged"""
+    file_path = _tracked_path(file_name)
     
+    # One open serves both the stat cache check and the hashing
     try:
-        with open(file_path, 'rb') as f:
-            return hashlib.sha256(f.read()).hexdigest()
-    except (FileNotFoundError, PermissionError):
+        with open(file_path, 'rb', buffering=0) as f:
+            st = os.fstat(f.fileno())
+            
+            # Skip reading the file when size and modification time match the last hash
+            cached = stat_cache.get(file_name) if stat_cache is not None else None
+            if cached and cached["mtime_ns"] == st.st_mtime_ns and cached["size"] == st.st_size:
+                return cached["sha"]
+            
+            file_hash = _hash_open_file(f, st.st_size)
+    except OSError:
+        if stat_cache is not None:
+            stat_cache.pop(file_name, None)
+        return None
+    
+    if stat_cache is not None:
+        stat_cache[file_name] = {
+            "sha": file_hash,
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size
+        }
+    return file_hash
+
+
+def hash_local_files(file_names, stat_cache=None):
+    """Hash several local files concurrently; returns {file_name: hash or None}"""
+    # hashlib releases the GIL while hashing, so files are hashed in parallel
+    # and the wait is the slowest file rather than the sum
+    workers = min(MAX_HASH_WORKERS, os.cpu_count() or 1, len(file_names))
+    if workers <= 1:
+        return {file_name: get_current_file_hash(file_name, stat_cache) for file_name in file_names}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        hashes = executor.map(lambda file_name: get_current_file_hash(file_name, stat_cache), file_names)
+        return dict(zip(file_names, hashes))
+
+
+def verify_local_against_stored(version_info):
+    """Compare local files with the hashes recorded for the current commit
+
+    Returns entries shaped like get_changed_files() output for files that
+    differ, or None if some tracked file has no recorded hash.
+    """
+    file_hashes = version_info["file_hashes"]
+    if any(file_name not in file_hashes for file_name in TRACKED_FILES):
         return None
+    
+    stat_cache = version_info.setdefault("stat_cache", {})
+    cached_stats = dict(stat_cache)
+    
+    current_hashes = hash_local_files(TRACKED_FILES, stat_cache)
+    
+    changed_files = []
+    for file_name in TRACKED_FILES:
+        stored_hash = file_hashes[file_name]
+        current_file_hash = current_hashes[file_name]
+        if current_file_hash != stored_hash:
+            changed_files.append({
+                "name": file_name,
+                "local_hash": stored_hash,
+                "current_hash": current_file_hash,
+                "repo_hash": stored_hash
+            })
+    
+    # Persist any newly computed hashes so the next run can skip them
+    if stat_cache != cached_stats:
+        save_version_info(version_info)
+    
+    return changed_files
 
 
-def get_changed_files(latest_commit_sha):
+def get_changed_files(latest_commit_sha, include_content=True, version_info=None):
     """Determine which files have changed by comparing hashes"""
-    current_version = load_version_info()
+    current_version = version_info if version_info is not None else load_version_info()
     changed_files = []
     
+    stat_cache = current_version.setdefault("stat_cache", {})
+    cached_stats = dict(stat_cache)
+    
+    # Blob SHAs for every file come from one tree request, so unchanged
+    # files never need their contents downloaded. A commit's tree never
+    # changes, so the SHAs from an earlier run for the same commit are reused.
+    tree_cache = current_version.get("tree_cache") or {}
+    tree_fetched = tree_cache.get("commit") != latest_commit_sha
+    if tree_fetched:
+        repo_tree = get_repo_tree(latest_commit_sha)
+        current_version["tree_cache"] = {
+            "commit": latest_commit_sha,
+            "files": repo_tree
+        }
+    else:
+        repo_tree = tree_cache["files"]
+    
+    current_hashes = hash_local_files([file_name for file_name in TRACKED_FILES if file_name in repo_tree],
+                                      stat_cache)
+    
     for file_name in TRACKED_FILES:
-        try:
-            # Get file content from repository
-            repo_content = get_file_from_repo(file_name, latest_commit_sha)
-            repo_hash = hashlib.sha256(repo_content.encode('utf-8')).hexdigest()
-            
-            # Compare with local file hash
-            local_hash = current_version["file_hashes"].get(file_name)
-            current_file_hash = get_current_file_hash(file_name)
-            
-            # Consider file changed if:
-            # 1. We don't have a recorded hash for it, OR
-            # 2. The recorded hash doesn't match the repo hash, OR  
-            # 3. The current file hash doesn't match the repo hash
-            if (local_hash != repo_hash or 
-                current_file_hash != repo_hash or 
-                current_file_hash is None):
-                changed_files.append({
-                    "name": file_name,
-                    "local_hash": local_hash,
-                    "current_hash": current_file_hash,
-                    "repo_hash": repo_hash,
-                    "content": repo_content
-                })
-        except Exception as e:
-            # If we can't get the file, consider it changed
+        repo_hash = repo_tree.get(file_name)
+        if repo_hash is None:
+            changed_files.append({
+                "name": file_name,
+                "error": "File not found in repository"
+            })
+            continue
+        
+        # Compare with local file hash
+        local_hash = current_version["file_hashes"].get(file_name)
+        current_file_hash = current_hashes[file_name]
+        
+        # Consider file changed if:
+        # 1. We don't have a recorded hash for it, OR
+        # 2. The recorded hash doesn't match the repo hash, OR  
+        # 3. The current file hash doesn't match the repo hash
+        if (local_hash != repo_hash or 
+            current_file_hash != repo_hash or 
+            current_file_hash is None):
             changed_files.append({
                 "name": file_name,
-                "error": str(e)
+                "local_hash": local_hash,
+                "current_hash": current_file_hash,
+                "repo_hash": repo_hash
             })
     
+    # Persist any newly computed hashes so the next run can skip them
+    if tree_fetched or stat_cache != cached_stats:
+        save_version_info(current_version)
+    
+    if not include_content:
+        return changed_files
+    
+    # Fetch the files that differ from a single tarball instead of one request each
+    to_fetch = [file_info for file_info in changed_files if "error" not in file_info]
+    if not to_fetch:
+        return changed_files
+    
+    try:
+        contents = fetch_tarball(latest_commit_sha, [file_info["name"] for file_info in to_fetch])
+        fetch_error = "File not found in repository archive"
+    except Exception as e:
+        contents = {}
+        fetch_error = str(e)
+    
+    for file_info in to_fetch:
+        content = contents.get(file_info["name"])
+        if content is not None:
+            file_info["content"] = content
+        else:
+            # If we can't get the file, consider it changed
+            for key in ("local_hash", "current_hash", "repo_hash"):
+                del file_info[key]
+            file_info["error"] = fetch_error
+    
     return changed_files
 
 
 def backup_file(file_path):
-    """Create backup of existing file"""
-    if file_path.exists():
-        backup_path = file_path.with_suffix(file_path.suffix + '.backup')
-        try:
-            shutil.copy2(file_path, backup_path)
-            return str(backup_path)
-        except Exception:
-            return None
-    return None
+    """Move an existing file aside as its backup, ready to be replaced"""
+    backup_path = file_path.with_suffix(file_path.suffix + '.backup')
+    try:
+        # A rename only touches directory metadata; the data isn't copied.
+        # Trying it directly also covers the "file doesn't exist" case.
+        os.replace(file_path, backup_path)
+    except Exception:
+        return None
+    return str(backup_path)
 
 
 def cleanup_backup_files(updated_files, keep_backups=False):
@@ -311,12 +796,15 @@ def cleanup_backup_files(updated_files, keep_backups=False):
     
     for file_info in updated_files:
         backup_path = file_info.get("backup")
-        if backup_path and Path(backup_path).exists():
-            try:
-                Path(backup_path).unlink()
-                cleaned_backups.append(backup_path)
-            except Exception as e:
-                failed_cleanups.append(f"{backup_path}: {str(e)}")
+        if not backup_path:
+            continue
+        try:
+            os.unlink(backup_path)
+            cleaned_backups.append(backup_path)
+        except FileNotFoundError:
+            pass  # Already gone
+        except Exception as e:
+            failed_cleanups.append(f"{backup_path}: {str(e)}")
     
     if cleaned_backups:
         print(f"Cleaned up {len(cleaned_backups)} backup files")
@@ -330,69 +818,95 @@ def cleanup_backup_files(updated_files, keep_backups=False):
 
 def update_files(changed_files):
     """Update the changed files"""
-    base_dir = Path(__file__).parent.parent
     updated_files = []
     failed_files = []
     
     for file_info in changed_files:
         file_name = file_info["name"]
-        file_path = base_dir / file_name
+        file_path = _tracked_path(file_name)
         
         if "error" in file_info:
             failed_files.append(f"{file_name}: {file_info['error']}")
             continue
         
+        temp_path = file_path.with_name(file_path.name + '.tmp')
+        backup_path = None
         try:
             # Create directory if it doesn't exist
             file_path.parent.mkdir(parents=True, exist_ok=True)
             
-            # Create backup
-            backup_path = backup_file(file_path)
-            
-            # Write new content
-            with open(file_path, 'w', encoding='utf-8', newline='\n') as f:
+            # Write new content exactly as stored in the repository, next to
+            # the original first so a failed write leaves it untouched
+            with open(temp_path, 'wb') as f:
                 f.write(file_info["content"])
             
+            # Create backup by moving the old file aside, then swap the new one in
+            backup_path = backup_file(file_path)
+            os.replace(temp_path, file_path)
+            
             updated_files.append({
                 "name": file_name,
                 "backup": backup_path
             })
             
         except Exception as e:
+            try:
+                temp_path.unlink()
+            except OSError:
+                pass
+            # The original was already moved aside; put it back
+            if backup_path:
+                try:
+                    os.replace(backup_path, file_path)
+                except OSError:
+                    pass
             failed_files.append(f"{file_name}: {str(e)}")
     
     return updated_files, failed_files
 
 
-def initialize_version_tracking(latest_commit_sha):
+def initialize_version_tracking(latest_commit_sha, version_info=None):
     """Initialize version tracking for first run"""
-    current_version = load_version_info()
+    current_version = version_info if version_info is not None else load_version_info()
     
     # If this is first run, record current file hashes and commit
     if is_first_run(current_version):
         print("Initializing version tracking...")
         
-        # Record current file hashes
+        # Record the repository's blob SHAs, not the local files' hashes:
+        # later checks on this commit compare local files against them.
+        # The integrity check has just fetched this commit's tree.
+        tree_cache = current_version.get("tree_cache") or {}
+        if tree_cache.get("commit") == latest_commit_sha:
+            repo_tree = tree_cache["files"]
+        else:
+            repo_tree = get_repo_tree(latest_commit_sha)
+            current_version["tree_cache"] = {
+                "commit": latest_commit_sha,
+                "files": repo_tree
+            }
         for file_name in TRACKED_FILES:
-            current_hash = get_current_file_hash(file_name)
-            if current_hash:
-                current_version["file_hashes"][file_name] = current_hash
+            if file_name in repo_tree:
+                current_version["file_hashes"][file_name] = repo_tree[file_name]
         
         # Record current commit
         current_version["last_commit"] = latest_commit_sha
-        current_version["last_check"] = get_latest_commit()["date"]
+        current_version["last_check"] = get_latest_commit(current_version)["date"]
         
         save_version_info(current_version)
         print("Version tracking initialized.")
 
 
-def perform_update(keep_backups=False):
+def perform_update(keep_backups=False, version_info=None):
     """Perform the actual update process"""
     try:
         print("Starting update process...")
         
+        # Load version info once and share it with every step below
+        current_version = version_info if version_info is not None else load_version_info()
+        
         # Check for updates
-        update_check = check_for_updates(silent=False)
+        update_check = check_for_updates(silent=False, version_info=current_version)
         if "error" in update_check:
             return {
                 "status": "error",
@@ -413,12 +927,11 @@ def perform_update(keep_backups=False):
         
         # Get changed files
         print("\nChecking for file changes...")
-        changed_files = get_changed_files(latest_commit["sha"])
+        changed_files = get_changed_files(latest_commit["sha"], version_info=current_version)
         
         if not changed_files:
             print("No file changes detected.")
             # Still update version info
-            current_version = load_version_info()
             current_version["last_commit"] = latest_commit["sha"]
             save_version_info(current_version)
             return {
@@ -435,13 +948,21 @@ def perform_update(keep_backups=False):
         updated_files, failed_files = update_files(changed_files)
         
         # Update version info
-        current_version = load_version_info()
         current_version["last_commit"] = latest_commit["sha"]
         
-        # Update file hashes for successfully updated files
+        # Update file hashes for successfully updated files only. A file that
+        # failed to update loses its recorded hash, so the next verify compares
+        # it against the repository and offers a repair.
+        written = {file_info["name"] for file_info in updated_files}
+        file_hashes = current_version["file_hashes"]
         for file_info in changed_files:
-            if "repo_hash" in file_info:
-                current_version["file_hashes"][file_info["name"]] = file_info["repo_hash"]
+            if file_info["name"] not in written:
+                file_hashes.pop(file_info["name"], None)
+        file_hashes.update({
+            file_info["name"]: file_info["repo_hash"]
+            for file_info in changed_files
+            if "repo_hash" in file_info and file_info["name"] in written
+        })
         
         current_version["last_check"] = latest_commit["date"]
         save_version_info(current_version)
@@ -474,8 +995,10 @@ def interactive_update():
     print("=" * 70)
     print()
     
+    version_info = load_version_info()
+    
     # Check for updates
-    update_check = check_for_updates(silent=False)
+    update_check = check_for_updates(silent=False, version_info=version_info)
     
     if "error" in update_check:
         print(f"Error checking for updates: {update_check['message']}")
@@ -506,7 +1029,7 @@ def interactive_update():
             print("Please enter Y or N.")
     
     # Perform update  
-    result = perform_update(keep_backups=False)  # Interactive mode defaults to cleaning backups
+    result = perform_update(keep_backups=False, version_info=version_info)  # Interactive mode defaults to cleaning backups
     
     if result["status"] == "error":
         print(f"\nUpdate failed: {result['message']}")
@@ -551,13 +1074,13 @@ def main():
             return 0 if result["status"] != "error" else 1
         elif sys.argv[1] == "--verify":
             # Check installation integrity (unified with update check)
-            result = check_for_updates(silent=True, include_integrity=True)
+            version_info = load_version_info()
+            result = check_for_updates(silent=True, include_integrity=True, version_info=version_info)
             
             # If this is first run and no critical issues, initialize tracking
-            if (result.get("integrity_status") == "ok" and is_first_run()):
+            if (result.get("integrity_status") == "ok" and is_first_run(version_info)):
                 try:
-                    latest_commit = get_latest_commit()
-                    initialize_version_tracking(latest_commit["sha"])
+                    initialize_version_tracking(result["latest_commit"]["sha"], version_info)
                 except Exception:
                     pass  # Ignore errors during initialization
             
@@ -569,7 +1092,7 @@ def main():
                 "missing_files": result.get("missing_files", []),
                 "corrupted_files": result.get("corrupted_files", []),
                 "updates_available": result.get("updates_available", False),
-                "is_first_run": is_first_run()
+                "is_first_run": is_first_run(version_info)
             }
             
             print(json.dumps(output, indent=2))
@@ -578,7 +1101,8 @@ def main():
             # Repair installation by downloading missing/corrupted files
             try:
                 print("Checking for missing or corrupted files...")
-                result = check_for_updates(silent=False, include_integrity=True)
+                version_info = load_version_info()
+                result = check_for_updates(silent=False, include_integrity=True, version_info=version_info)
                 
                 if result.get("integrity_status") == "critical":
                     missing_files = result.get("missing_files", [])
@@ -588,38 +1112,55 @@ def main():
                         print(f"Found {len(missing_files)} missing and {len(corrupted_files)} corrupted files")
                         
                         # Get latest commit
-                        latest_commit = get_latest_commit()
+                        latest_commit = result["latest_commit"]
                         
                         # Repair each missing/corrupted file
                         repaired_count = 0
+                        repaired_hashes = {}
+                        repair_backups = []
                         failed_repairs = []
                         
-                        for file_name in missing_files + corrupted_files:
+                        # Download every file concurrently up front; the requests are
+                        # independent, so the wait is the slowest one rather than the sum
+                        repair_names = missing_files + corrupted_files
+                        download_executor = ThreadPoolExecutor(max_workers=min(MAX_DOWNLOAD_WORKERS, len(repair_names)))
+                        downloads = [download_executor.submit(_download_with_hash, file_name, latest_commit["sha"])
+                                     for file_name in repair_names]
+                        download_executor.shutdown(wait=False)
+                        
+                        for file_name, download in zip(repair_names, downloads):
                             try:
                                 print(f"Repairing {file_name}...")
                                 
                                 # Download file content
-                                file_content = get_file_from_repo(file_name, latest_commit["sha"])
+                                file_content, file_hash = download.result()
+                                if file_content is None:
+                                    print(f"  ✗ Failed to repair {file_name}: not found in repository")
+                                    failed_repairs.append(file_name)
+                                    continue
                                 
                                 # Determine file path
-                                base_dir = Path(__file__).parent.parent
-                                file_path = base_dir / file_name
+                                file_path = _tracked_path(file_name)
                                 
                                 # Create directory if needed
                                 file_path.parent.mkdir(parents=True, exist_ok=True)
                                 
                                 # Create backup if file exists
-                                if file_path.exists():
-                                    backup_path = file_path.with_suffix(file_path.suffix + '.backup')
-                                    file_path.rename(backup_path)
+                                backup_path = file_path.with_suffix(file_path.suffix + '.backup')
+                                try:
+                                    os.replace(file_path, backup_path)
+                                    repair_backups.append(str(backup_path))
                                     print(f"  Created backup: {backup_path}")
+                                except FileNotFoundError:
+                                    pass
                                 
-                                # Write new content
-                                with open(file_path, 'w', encoding='utf-8', newline='\n') as f:
+                                # Write new content exactly as stored in the repository
+                                with open(file_path, 'wb') as f:
                                     f.write(file_content)
                                 
                                 print(f"  ✓ Successfully repaired {file_name}")
                                 repaired_count += 1
+                                repaired_hashes[file_name] = file_hash
                                 
                             except Exception as e:
                                 print(f"  ✗ Failed to repair {file_name}: {str(e)}")
@@ -630,30 +1171,18 @@ def main():
                             print(f"Failed repairs: {', '.join(failed_repairs)}")
                             return 1
                         
-                        # Update version info with current hashes
-                        current_version = load_version_info()
+                        # Update version info with the hashes of the written content
+                        current_version = version_info
                         current_version["last_commit"] = latest_commit["sha"]
-                        for file_name in missing_files + corrupted_files:
-                            if file_name not in failed_repairs:
-                                current_hash = get_current_file_hash(file_name)
-                                if current_hash:
-                                    current_version["file_hashes"][file_name] = current_hash
+                        current_version["file_hashes"].update(repaired_hashes)
                         save_version_info(current_version)
                         
                         # Clean up backup files created during repair (unless keep_backups is True)
                         if not keep_backups:
                             print("\nCleaning up backup files...")
-                            repair_files = []
-                            for file_name in missing_files + corrupted_files:
-                                if file_name not in failed_repairs:
-                                    base_dir = Path(__file__).parent.parent
-                                    file_path = base_dir / file_name
-                                    backup_path = file_path.with_suffix(file_path.suffix + '.backup')
-                                    if backup_path.exists():
-                                        repair_files.append({"backup": str(backup_path)})
-                            
-                            if repair_files:
-                                cleanup_backup_files(repair_files)
+                            # Only the backups this repair created, as recorded above
+                            if repair_backups:
+                                cleanup_backup_files([{"backup": backup_path} for backup_path in repair_backups])
                         else:
                             print("\nBackup files preserved (--keep-backups was specified)")
                         